@@ -1,148 +1,14 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-import hashlib
-import os
-
-DB_PATH = "smartlearn.db"
-
-# ========== DB Helpers ==========
-def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
-
-def ensure_tables():
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # Questions
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS questions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        question TEXT UNIQUE,
-        option_a TEXT,
-        option_b TEXT,
-        option_c TEXT,
-        option_d TEXT,
-        answer TEXT,
-        subject TEXT,
-        chapter TEXT,
-        topic TEXT,
-        difficulty TEXT,
-        type TEXT
-    );
-    """)
-
-    # Scores
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS student_scores (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id TEXT,
-        question_id INTEGER,
-        is_correct INTEGER,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    """)
-
-    # Reminders
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS reminders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id TEXT,
-        weak_chapters TEXT,
-        reminder_text TEXT,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    """)
-
-    # Users
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE,
-        password_hash TEXT,
-        role TEXT
-    );
-    """)
-    conn.commit()
-    conn.close()
-
-def fetch_df(query, params=()):
-    conn = get_conn()
-    try:
-        df = pd.read_sql_query(query, conn, params=params)
-    finally:
-        conn.close()
-    return df
-
-def execute(query, params=()):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(query, params)
-    conn.commit()
-    conn.close()
-
-# ========== Authentication ==========
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def authenticate(username, password):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT password_hash, role FROM users WHERE username=?", (username,))
-    row = cur.fetchone()
-    conn.close()
-    if row:
-        stored_hash, role = row
-        if stored_hash == hash_password(password):
-            return True, role
-    return False, None
-
-def seed_users():
-    conn = get_conn()
-    cur = conn.cursor()
-    demo_users = [
-        ("student1", hash_password("1234"), "student"),
-        ("teacher1", hash_password("admin"), "teacher"),
-    ]
-    for u in demo_users:
-        try:
-            cur.execute("INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)", u)
-        except sqlite3.IntegrityError:
-            pass
-    conn.commit()
-    conn.close()
-
-# ========== Features ==========
-def compute_weak_chapters(student_id, limit_chaps=3):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-    SELECT q.chapter, SUM(s.is_correct) AS correct, COUNT(*) AS total
-    FROM student_scores s
-    JOIN questions q ON s.question_id = q.id
-    WHERE s.student_id = ?
-    GROUP BY q.chapter
-    ORDER BY (1.0*SUM(s.is_correct)/COUNT(*)) ASC
-    LIMIT ?
-    """, (student_id, limit_chaps))
-    rows = cur.fetchall()
-    conn.close()
-    return [r[0] for r in rows]
-
-def save_reminder(student_id, weak_chapters, reminder_text):
-    execute("INSERT INTO reminders (student_id, weak_chapters, reminder_text) VALUES (?, ?, ?)",
-            (student_id, ",".join(weak_chapters), reminder_text))
 
+from smartlearn.db import *
+
+# ========== Pages ==========
 # ---- Take Test ----
 def take_test_ui(student_id, n_questions=5):
     st.header("Take Test")
 
     if "test_questions" not in st.session_state or st.session_state.get("test_student") != student_id:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT id, question, option_a, option_b, option_c, option_d, answer FROM questions ORDER BY RANDOM() LIMIT ?", (n_questions,))
-        rows = cur.fetchall()
-        conn.close()
+        rows = pick_random_questions(n_questions)
 
         if not rows:
             st.warning("⚠️ No questions in DB. Add some first.")
@@ -150,29 +16,19 @@ def take_test_ui(student_id, n_questions=5):
 
         st.session_state.test_questions = rows
         st.session_state.test_student = student_id
-        st.session_state.answers = {r[0]: "" for r in rows}
+        st.session_state.answers = {r["id"]: "" for r in rows}
 
     rows = st.session_state.test_questions
-    for i, r in enumerate(rows, start=1):
-        qid, qtext, a, b, c, d, ans = r
-        st.markdown(f"**Q{i}. {qtext}**")
-        choice = st.radio("", ("A","B","C","D"), key=f"q_{qid}")
-        st.session_state.answers[qid] = choice
-
-    if st.button("Submit Test"):
-        conn = get_conn()
-        cur = conn.cursor()
-        correct_count = 0
-        for qid, user_choice in st.session_state.answers.items():
-            cur.execute("SELECT answer FROM questions WHERE id=?", (qid,))
-            row = cur.fetchone()
-            correct_ans = row[0].strip().upper()[0] if row and row[0] else ""
-            is_correct = 1 if user_choice == correct_ans else 0
-            if is_correct: correct_count += 1
-            cur.execute("INSERT INTO student_scores (student_id, question_id, is_correct) VALUES (?, ?, ?)",
-                        (student_id, qid, is_correct))
-        conn.commit()
-        conn.close()
+    # A form batches the radio clicks: the script reruns once, on submit
+    with st.form("test_form", clear_on_submit=True):
+        for i, r in enumerate(rows, start=1):
+            st.markdown(f"**Q{i}. {r['question']}**")
+            choice = st.radio("", ("A","B","C","D"), key=f"q_{r['id']}")
+            st.session_state.answers[r["id"]] = choice
+        submitted = st.form_submit_button("Submit Test")
+
+    if submitted:
+        correct_count = save_test_answers(student_id, st.session_state.answers)
 
         st.session_state.pop("test_questions", None)
         st.session_state.pop("test_student", None)
@@ -190,53 +46,68 @@ def adaptive_test_ui(student_id, n_questions=5):
         return
     st.write("Weak chapters:", weak)
 
-    placeholders = ",".join("?"*len(weak))
-    query = f"SELECT id, question, option_a, option_b, option_c, option_d, answer FROM questions WHERE chapter IN ({placeholders}) ORDER BY RANDOM() LIMIT ?"
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(query, tuple(weak)+(n_questions,))
-    rows = cur.fetchall()
-    conn.close()
-    if not rows:
-        st.warning("No questions available in weak chapters.")
-        return
+    # Keep the sampled questions across reruns so the answers survive the submit click
+    if "adaptive_questions" not in st.session_state or st.session_state.get("adaptive_student") != student_id:
+        rows = pick_chapter_questions(weak, n_questions)
+        if not rows:
+            st.warning("No questions available in weak chapters.")
+            return
+
+        st.session_state.adaptive_questions = rows
+        st.session_state.adaptive_student = student_id
+        st.session_state.adaptive_answers = {r["id"]: "" for r in rows}
+
+    rows = st.session_state.adaptive_questions
+    # A form batches the radio clicks: the script reruns once, on submit
+    with st.form("adaptive_form", clear_on_submit=True):
+        for i, r in enumerate(rows, start=1):
+            st.markdown(f"**Q{i}. {r['question']}**")
+            choice = st.radio("", ("A","B","C","D"), key=f"aq_{r['id']}")
+            st.session_state.adaptive_answers[r["id"]] = choice
+        submitted = st.form_submit_button("Submit Adaptive Test")
+
+    if submitted:
+        correct_count = save_test_answers(student_id, st.session_state.adaptive_answers)
 
-    for i, r in enumerate(rows, start=1):
-        qid, qtext, a, b, c, d, ans = r
-        st.markdown(f"**Q{i}. {qtext}**")
-        choice = st.radio("", ("A","B","C","D"), key=f"aq_{qid}")
-        if st.button("Submit Adaptive Test", key=f"submit_{i}"):
-            conn = get_conn()
-            cur = conn.cursor()
-            correct_ans = ans.strip().upper()[0] if ans else ""
-            is_correct = 1 if choice == correct_ans else 0
-            cur.execute("INSERT INTO student_scores (student_id, question_id, is_correct) VALUES (?, ?, ?)",
-                        (student_id, qid, is_correct))
-            conn.commit(); conn.close()
-            st.success("Saved answer!")
+        st.session_state.pop("adaptive_questions", None)
+        st.session_state.pop("adaptive_student", None)
+        st.session_state.pop("adaptive_answers", None)
+
+        total = len(rows)
+        st.success(f"✅ Score: {correct_count}/{total} ({round(100*correct_count/total,2)}%)")
 
 # ---- Dashboard ----
 def student_dashboard_ui(student_id):
     st.header(f"📊 Dashboard — {student_id}")
-    df_overall = fetch_df("SELECT COUNT(*) AS attempted, SUM(is_correct) AS correct FROM student_scores WHERE student_id=?", (student_id,))
-    if df_overall.empty or df_overall.at[0,"attempted"] == 0:
+    rows = load_student_attempts(student_id)
+    if rows.empty:
         st.info("No attempts yet.")
         return
-    attempted = int(df_overall.at[0,"attempted"])
-    correct = int(df_overall.at[0,"correct"] or 0)
+    attempted = len(rows)
+    correct = int(rows["is_correct"].sum())
     accuracy = round(100.0 * correct / attempted, 2)
     st.metric("Total Attempted", attempted)
     st.metric("Correct Answers", correct)
     st.metric("Accuracy (%)", accuracy)
 
+    def accuracy_by(col):
+        df = rows.groupby(col)["is_correct"].agg(attempted="count", correct="sum")
+        df["accuracy"] = (100.0 * df["correct"] / df["attempted"]).round(2)
+        return df
+
+    st.subheader("Subject-wise Accuracy")
+    st.dataframe(accuracy_by("subject"))
+
+    st.subheader("Weak Chapters")
+    st.dataframe(accuracy_by("chapter").sort_values("accuracy").head(3))
+
+    st.subheader("Accuracy Trend")
+    st.line_chart(rows["trend_acc"])
+
 # ---- Leaderboard ----
 def leaderboard_ui():
     st.header("🏆 Leaderboard")
-    df = fetch_df("""
-        SELECT s.student_id AS student, COUNT(s.id) AS attempted, SUM(s.is_correct) AS correct,
-               ROUND(100.0*SUM(s.is_correct)/COUNT(s.id),2) AS accuracy
-        FROM student_scores s GROUP BY s.student_id ORDER BY accuracy DESC, attempted DESC
-    """)
+    df = load_leaderboard()
     if df.empty:
         st.info("No scores yet.")
     else:
@@ -245,16 +116,11 @@ def leaderboard_ui():
 # ---- Reminders ----
 def reminders_ui():
     st.header("🔔 Reminders")
-    df = fetch_df("""
-        SELECT s.student_id AS student, COUNT(s.id) AS attempted, SUM(s.is_correct) AS correct,
-               ROUND(100.0*SUM(s.is_correct)/COUNT(s.id),2) AS accuracy
-        FROM student_scores s GROUP BY s.student_id ORDER BY accuracy ASC, attempted DESC
-    """)
+    df = load_leaderboard(ascending=True)
     if df.empty:
         st.info("No students yet.")
         return
-    for _, row in df.iterrows():
-        sid = row['student']
+    for sid in df['student'].tolist():
         if st.button(f"Generate reminder for {sid}"):
             weak_chaps = compute_weak_chapters(sid)
             reminder_text = f"Please revise: {', '.join(weak_chaps)}"
@@ -283,12 +149,19 @@ def add_question_ui():
                 (question, option_a, option_b, option_c, option_d, answer, subject, chapter, topic, difficulty, type)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (qtext, opt_a, opt_b, opt_c, opt_d, answer, subject, chapter, topic, difficulty, qtype))
+            invalidate_question_caches()
             st.success("✅ Question added.")
 
 # ========== App ==========
+# Schema setup and demo users only need to run once per server process
+@st.cache_resource
+def _bootstrap():
+    ensure_tables()
+    seed_users()
+    return True
+
 st.set_page_config(page_title="SmartLearn AI", layout="wide")
-ensure_tables()
-seed_users()
+_bootstrap()
 
 # ---- Login ----
 if "logged_in" not in st.session_state:
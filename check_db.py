@@ -14,23 +14,19 @@ cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
 tables = [t[0] for t in cur.fetchall()]
 print("Tables in DB:", tables)
 
-if "questions" in tables:
-    cur.execute("SELECT COUNT(*) FROM questions")
-    print("Questions:", cur.fetchone()[0])
-else:
-    print("questions table is missing.")
+# (table, label) pairs to report; counted together in one UNION ALL query
+checks = [("questions", "Questions"), ("student_scores", "student_scores rows"), ("reminders", "reminders rows")]
+present = [t for t, _ in checks if t in tables]
+counts = {}
+if present:
+    cur.execute(" UNION ALL ".join(f"SELECT '{t}', COUNT(*) FROM {t}" for t in present))
+    counts = dict(cur.fetchall())
 
-if "student_scores" in tables:
-    cur.execute("SELECT COUNT(*) FROM student_scores")
-    print("student_scores rows:", cur.fetchone()[0])
-else:
-    print("student_scores table is missing.")
-
-if "reminders" in tables:
-    cur.execute("SELECT COUNT(*) FROM reminders")
-    print("reminders rows:", cur.fetchone()[0])
-else:
-    print("reminders table is missing.")
+for t, label in checks:
+    if t in counts:
+        print(f"{label}:", counts[t])
+    else:
+        print(f"{t} table is missing.")
 
 cur.close()
 conn.close()
@@ -5,16 +5,32 @@ Usage (Windows CMD / PowerShell):
   python import_questions.py
   OR
   python import_questions.py MyQuestions.xlsx
+  OR, to import every sheet of the workbook (parsed in parallel):
+  python import_questions.py MyQuestions.xlsx --all-sheets
+  OR, to bound memory on very large sheets (reads in chunks, slower):
+  python import_questions.py MyQuestions.xlsx --stream
 
 Requirements:
   pip install pandas openpyxl
+  (optional, much faster Excel parsing) pip install python-calamine
 """
 
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 import sqlite3
+import openpyxl
 import pandas as pd
 import sys
 import os
 
+# Arrow-backed strings are more compact and faster to iterate when pyarrow is installed
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
 DB_PATH = "smartlearn.db"
 DEFAULT_XLSX = "SmartLearn_Effective50.xlsx"
 
@@ -36,81 +52,137 @@ def ensure_table(conn):
         type TEXT
     );
     """)
+    # For downstream subject/chapter filtering of the imported bank
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_questions_subject_chapter ON questions(subject, chapter)")
     conn.commit()
 
-def load_excel(xlsx_path):
-    # Read Excel into DataFrame; expect header columns matching:
-    # Question, Option A, Option B, Option C, Option D, Answer, Subject, Chapter, Topic, Difficulty, Type
-    df = pd.read_excel(xlsx_path, engine="openpyxl")
-    # Normalize column names (strip, lower)
-    df.columns = [c.strip() for c in df.columns]
-    expected = ["Question","Option A","Option B","Option C","Option D","Answer","Subject","Chapter","Topic","Difficulty","Type"]
-    # If headers vary slightly (like option_a), attempt tolerant mapping:
+EXPECTED = ["Question","Option A","Option B","Option C","Option D","Answer","Subject","Chapter","Topic","Difficulty","Type"]
+# Common alternative header names, tried when the expected name isn't found
+ALT_MAP = {
+    "Option A": ["OptionA","A","opt a","opt_a","option_a"],
+    "Option B": ["OptionB","B","opt b","opt_b","option_b"],
+    "Option C": ["OptionC","C","opt c","opt_c","option_c"],
+    "Option D": ["OptionD","D","opt d","opt_d","option_d"],
+    "Answer": ["Ans","Correct Answer","Correct","answer_key","answer_option"],
+    "Question": ["Q","Question Text","question_text"],
+    "Subject": ["subject"],
+    "Chapter": ["chapter"],
+    "Topic": ["topic"],
+    "Difficulty": ["difficulty"],
+    "Type": ["type"]
+}
+DB_COLS = ["question","option_a","option_b","option_c","option_d",
+           "answer","subject","chapter","topic","difficulty","type"]
+# Duplicates (UNIQUE question) are skipped by SQLite via the unique index
+# rather than by catching IntegrityError per row. NOT EXISTS is used instead
+# of INSERT OR IGNORE, which still advances the AUTOINCREMENT counter for
+# every ignored row and leaves gaps in question ids on re-imports.
+_INSERT_SQL = """
+INSERT INTO questions (question, option_a, option_b, option_c, option_d,
+                       answer, subject, chapter, topic, difficulty, type)
+SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+WHERE NOT EXISTS (SELECT 1 FROM questions WHERE question = ?)
+"""
+CHUNK_SIZE = 10_000  # rows per executemany/transaction
+
+# First option letter anywhere in an answer (last-resort answer normalization)
+_ANS_PATTERN = r"([ABCD])"
+
+@lru_cache(maxsize=None)
+def _norm(name):
+    # Cached: the same handful of header/alias names is normalized on every lookup
+    return name.strip().lower().replace("_"," ").replace("-", " ")
+
+def resolve_columns(columns):
+    """Map each expected header to the actual column name in `columns`,
+    matching case/underscore/dash-insensitively, then via ALT_MAP."""
+    actual_by_norm = {}
+    for actual in columns:
+        actual_by_norm.setdefault(_norm(actual), actual)  # first match wins
     cols_map = {}
-    for e in expected:
-        for actual in df.columns:
-            if actual.lower().replace("_"," ").replace("-", " ") == e.lower().replace("_"," ").replace("-", " "):
+    for e in EXPECTED:
+        for name in [e] + ALT_MAP.get(e, []):
+            actual = actual_by_norm.get(_norm(name))
+            if actual is not None:
                 cols_map[e] = actual
                 break
-    # If some expected missing, try common alternatives
-    alt_map = {
-        "Option A": ["OptionA","A","opt a","opt_a","option_a"],
-        "Option B": ["OptionB","B","opt b","opt_b","option_b"],
-        "Option C": ["OptionC","C","opt c","opt_c","option_c"],
-        "Option D": ["OptionD","D","opt d","opt_d","option_d"],
-        "Answer": ["Ans","Correct Answer","Correct","answer_key","answer_option"],
-        "Question": ["Q","Question Text","question_text"],
-        "Subject": ["subject"],
-        "Chapter": ["chapter"],
-        "Topic": ["topic"],
-        "Difficulty": ["difficulty"],
-        "Type": ["type"]
-    }
-    for e in expected:
-        if e not in cols_map:
-            for alt in alt_map.get(e, []):
-                for actual in df.columns:
-                    if actual.lower().replace("_"," ").replace("-", " ") == alt.lower().replace("_"," ").replace("-", " "):
-                        cols_map[e] = actual
-                        break
-                if e in cols_map:
-                    break
+    return cols_map
+
+def _worksheet(wb, sheet=None):
+    # Default to the first sheet, like pd.read_excel
+    return wb[sheet] if sheet is not None else wb.worksheets[0]
+
+def _header_names(row):
+    return [str(h).strip() if h is not None else f"Unnamed: {i}" for i, h in enumerate(row)]
+
+def _resolve_positions(header):
+    """resolve_columns(header) plus the sorted positions of the mapped columns."""
+    cols_map = resolve_columns(header)
+    return cols_map, sorted({header.index(actual) for actual in cols_map.values()})
 
-    missing = [e for e in expected if e not in cols_map]
+def read_sheet(xlsx_path, sheet=None):
+    """Read a sheet as text, keeping only the columns resolve_columns maps.
+    Returns (df, cols_map, header)."""
+    # Prefer the Rust-based calamine engine (pandas >= 2.2 + python-calamine).
+    # dtype=str and na_filter=False skip type inference and the NA scan.
+    # calamine parses the whole sheet whatever usecols/nrows say, so it is
+    # read once and the columns are resolved from the result.
+    try:
+        df = pd.read_excel(xlsx_path, engine="calamine", sheet_name=sheet or 0,
+                           dtype=str, na_filter=False)
+    except (ImportError, ValueError):
+        pass
+    else:
+        header = [str(c).strip() for c in df.columns]
+        df.columns = header
+        cols_map, positions = _resolve_positions(header)
+        return df.iloc[:, positions], cols_map, header
+    # Fallback: openpyxl in read-only mode, values only (no Cell objects);
+    # only the resolved columns of each row are kept
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        rows = _worksheet(wb, sheet).iter_rows(values_only=True)
+        header = _header_names(next(rows, ()))
+        cols_map, positions = _resolve_positions(header)
+        df = pd.DataFrame([[r[p] if p < len(r) else None for p in positions] for r in rows],
+                          columns=[header[p] for p in positions])
+        return df, cols_map, header
+    finally:
+        wb.close()
+
+def _warn_missing(cols_map, header):
+    missing = [e for e in EXPECTED if e not in cols_map]
     if missing:
         print("Warning: Excel missing columns:", missing)
-        print("Found columns:", list(df.columns))
-        # continue with best-effort; fill missing with empty strings
-        for m in missing:
-            df[m] = ""
+        print("Found columns:", header)
+        # continue with best-effort; missing columns are filled with empty strings below
+
+def clean_frame(df, cols_map):
+    """Turn a raw text frame (sheet header names as columns) into import-ready
+    rows: expected columns in order, stripped, answers normalized to A-D."""
+    expected = EXPECTED
+    # Build DataFrame with expected column order in one construction
+    data = {e: df[cols_map[e]] if e in cols_map else "" for e in expected}
+    ordered_df = pd.DataFrame(data, index=df.index)
 
-    # Build DataFrame with expected column order
-    ordered_df = pd.DataFrame()
+    # Clean whitespace once for every column, so rows are import-ready
     for e in expected:
-        ordered_df[e] = df[cols_map[e]] if e in cols_map else df.get(e, "")
-
-    # Clean whitespace & convert answer to single-letter (A/B/C/D) where possible
-    ordered_df = ordered_df.fillna("")
-    ordered_df["Answer"] = ordered_df["Answer"].astype(str).str.strip()
-    # If answers are full options like "5 m/s^2", convert to letter by comparing to options
-    def normalize_answer(row):
-        ans = row["Answer"].strip()
-        opts = [str(row["Option A"]).strip(), str(row["Option B"]).strip(), str(row["Option C"]).strip(), str(row["Option D"]).strip()]
-        if not ans:
-            return ""
-        # If ans is single letter already
-        if len(ans) == 1 and ans.upper() in ("A","B","C","D"):
-            return ans.upper()
-        # Try to match text to option
-        for i,opt in enumerate(opts):
-            if ans.lower() == opt.lower():
-                return ["A","B","C","D"][i]
-        # fallback: if answer contains option letter
-        for ch in ans.upper():
-            if ch in ("A","B","C","D"):
-                return ch
-        return ans  # leave as-is
-    ordered_df["Answer"] = ordered_df.apply(normalize_answer, axis=1)
+        ordered_df[e] = ordered_df[e].astype(STRING_DTYPE).str.strip().fillna("")
+
+    # Convert answers to a single letter (A/B/C/D) with whole-column ops:
+    # 1) already a single letter A-D, 2) text equal to one of the options
+    # (caseless, via casefold), 3) first A-D letter anywhere in the answer,
+    # otherwise leave as-is
+    ans = ordered_df["Answer"]
+    ans_up = ans.str.upper()
+    letter = ans_up.where(ans_up.isin(["A","B","C","D"]) & (ans.str.len() == 1))
+    ans_cf = ans.str.casefold()
+    for i, col in enumerate(["Option A","Option B","Option C","Option D"]):
+        opt_cf = ordered_df[col].str.casefold()
+        mask = letter.isna() & (ans != "") & (ans_cf == opt_cf)
+        letter = letter.mask(mask, "ABCD"[i])
+    letter = letter.fillna(ans_up.str.extract(_ANS_PATTERN, expand=False))
+    ordered_df["Answer"] = letter.fillna(ans)
     # Rename columns to DB fields
     ordered_df = ordered_df.rename(columns={
         "Question":"question",
@@ -118,48 +190,107 @@ def load_excel(xlsx_path):
         "Answer":"answer","Subject":"subject","Chapter":"chapter","Topic":"topic",
         "Difficulty":"difficulty","Type":"type"
     })
+    # Low-cardinality columns: store each distinct value once
+    for c in ("answer","subject","chapter","topic","difficulty","type"):
+        ordered_df[c] = ordered_df[c].astype("category")
     return ordered_df
 
-def import_to_db(df, conn):
+def load_excel(xlsx_path, sheet=None):
+    # Read Excel into DataFrame; expect header columns matching:
+    # Question, Option A, Option B, Option C, Option D, Answer, Subject, Chapter, Topic, Difficulty, Type
+    # If headers vary slightly (like option_a), attempt tolerant mapping
+    df, cols_map, header = read_sheet(xlsx_path, sheet)
+    _warn_missing(cols_map, header)
+    return clean_frame(df, cols_map)
+
+def iter_excel_chunks(xlsx_path, sheets=(None,), chunk_size=CHUNK_SIZE):
+    """Like load_excel, but yields each of `sheets` as import-ready frames of
+    at most `chunk_size` rows, so memory stays bounded on very large workbooks.
+    Uses openpyxl in read-only mode; slower than calamine but never holds
+    a whole sheet. The workbook (and its shared strings) is opened once for
+    all sheets."""
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        for sheet in sheets:
+            rows = _worksheet(wb, sheet).iter_rows(values_only=True)
+            header = _header_names(next(rows, ()))
+            cols_map, positions = _resolve_positions(header)
+            columns = [header[p] for p in positions]
+            _warn_missing(cols_map, header)
+            while True:
+                chunk = [[r[p] if p < len(r) else None for p in positions]
+                         for r in itertools.islice(rows, chunk_size)]
+                if not chunk:
+                    break
+                yield clean_frame(pd.DataFrame(chunk, columns=columns, dtype=object), cols_map)
+    finally:
+        wb.close()
+
+def import_rows(rows, conn, chunk_size=CHUNK_SIZE):
+    """Insert DB_COLS-ordered tuples from any iterable; returns (inserted, skipped)."""
+    seen = 0
+    def params():
+        nonlocal seen
+        for r in rows:
+            seen += 1
+            if r[0]:  # skip blank questions
+                yield r + (r[0],)
     cur = conn.cursor()
     inserted = 0
-    skipped = 0
-    for _, row in df.iterrows():
-        vals = (
-            str(row.get("question","")).strip(),
-            str(row.get("option_a","")).strip(),
-            str(row.get("option_b","")).strip(),
-            str(row.get("option_c","")).strip(),
-            str(row.get("option_d","")).strip(),
-            str(row.get("answer","")).strip(),
-            str(row.get("subject","")).strip(),
-            str(row.get("chapter","")).strip(),
-            str(row.get("topic","")).strip(),
-            str(row.get("difficulty","")).strip(),
-            str(row.get("type","")).strip()
-        )
-        if not vals[0]:
-            skipped += 1
-            continue
-        try:
-            cur.execute("""
-            INSERT INTO questions (question, option_a, option_b, option_c, option_d,
-                                   answer, subject, chapter, topic, difficulty, type)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, vals)
-            inserted += 1
-        except sqlite3.IntegrityError:
-            # unique constraint on question — skip duplicates
-            skipped += 1
-        except Exception as e:
-            print("Error inserting row:", e)
-            skipped += 1
-    conn.commit()
+    it = params()
+    # One transaction per chunk keeps the WAL bounded on very large sheets
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        cur.executemany(_INSERT_SQL, chunk)
+        conn.commit()
+        inserted += cur.rowcount
+    skipped = seen - inserted
     return inserted, skipped
 
+def sheet_names(xlsx_path):
+    # calamine lists sheets without loading the shared-strings table, which
+    # openpyxl does even in read-only mode
+    try:
+        with pd.ExcelFile(xlsx_path, engine="calamine") as xl:
+            return xl.sheet_names
+    except (ImportError, ValueError):
+        pass
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True)
+    try:
+        return wb.sheetnames
+    finally:
+        wb.close()
+
+def load_excel_sheets(xlsx_path, sheets=None):
+    """load_excel for each of `sheets` (default: every sheet), concatenated.
+    Sheets are independent, so several are parsed in separate processes."""
+    if sheets is None:
+        sheets = sheet_names(xlsx_path)
+    if len(sheets) == 1:
+        return load_excel(xlsx_path, sheets[0])
+    with ProcessPoolExecutor(max_workers=min(len(sheets), os.cpu_count() or 1)) as ex:
+        dfs = list(ex.map(partial(load_excel, xlsx_path), sheets))
+    return pd.concat(dfs, ignore_index=True)
+
+def import_to_db(frames, conn):
+    """Insert one frame from load_excel, or an iterable of them (e.g. from
+    iter_excel_chunks); returns (inserted, skipped)."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    # clean_frame already stripped every column, so rows go in as they are
+    return import_rows(itertools.chain.from_iterable(
+        df[DB_COLS].itertuples(index=False, name=None) for df in frames), conn)
+
 def main():
     # choose excel path
-    xlsx = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_XLSX
+    flags = {"--all-sheets", "--stream"}
+    args = [a for a in sys.argv[1:] if a not in flags]
+    all_sheets = "--all-sheets" in sys.argv[1:]
+    stream = "--stream" in sys.argv[1:]
+    xlsx = args[0] if args else DEFAULT_XLSX
     if not os.path.exists(xlsx):
         print(f"File not found: {xlsx}")
         print("Place the Excel file in the script folder or pass the filename as an argument.")
@@ -167,12 +298,24 @@ def main():
 
     # connect DB and ensure table
     conn = sqlite3.connect(DB_PATH)
+    # One-shot bulk load: WAL + NORMAL sync, big page cache, and hold the
+    # database lock for the whole run
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+    conn.execute("PRAGMA locking_mode=EXCLUSIVE")
     ensure_table(conn)
 
     print("Reading Excel:", xlsx)
-    df = load_excel(xlsx)
-    print("Rows to import:", len(df))
-    ins, skip = import_to_db(df, conn)
+    # Which sheets to import is independent of how they are parsed
+    sheets = sheet_names(xlsx) if all_sheets else [None]
+    if stream:
+        frames = iter_excel_chunks(xlsx, sheets)
+    else:
+        frames = load_excel_sheets(xlsx, sheets)
+    ins, skip = import_to_db(frames, conn)
+    print("Rows read:", ins + skip)
     print(f"Done. Inserted: {ins}, Skipped (duplicates/blank): {skip}")
 
     # show counts
@@ -7,6 +7,10 @@ if not os.path.exists(DB):
     raise SystemExit(1)
 
 conn = sqlite3.connect(DB)
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("PRAGMA synchronous=NORMAL")
+conn.execute("PRAGMA temp_store=MEMORY")
+conn.execute("PRAGMA cache_size=-65536")  # 64 MB
 cur = conn.cursor()
 
 # Ensure student_scores table exists
@@ -30,12 +34,14 @@ if not ids:
     raise SystemExit(1)
 
 students = ["student_1","student_2","student_3"]
-for s in students:
-    for _ in range(8):  # each student attempts 8 random questions
-        qid = random.choice(ids)
-        is_correct = random.choice([0,1,1])  # bias slightly towards correct
-        cur.execute("INSERT INTO student_scores (student_id, question_id, is_correct) VALUES (?, ?, ?)",
-                    (s, qid, is_correct))
+per_student = 8  # each student attempts 8 random questions
+n = len(students) * per_student
+picks = random.choices(ids, k=n)
+correct = random.choices([0,1,1], k=n)  # bias slightly towards correct
+attempts = [s for s in students for _ in range(per_student)]
+cur.execute("BEGIN IMMEDIATE")  # all inserts in one transaction, one fsync
+cur.executemany("INSERT INTO student_scores (student_id, question_id, is_correct) VALUES (?, ?, ?)",
+                zip(attempts, picks, correct))
 conn.commit()
 print("Seeded sample student_scores for demo students:", students)
 conn.close()
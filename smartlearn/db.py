@@ -0,0 +1,285 @@
+"""
+smartlearn/db.py
+
+SQLite access, authentication and data helpers shared by the Streamlit app.
+"""
+
+import streamlit as st
+import sqlite3
+import pandas as pd
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+
+DB_PATH = "smartlearn.db"
+
+# Serializes writers on the shared connection (Streamlit runs sessions in threads)
+_write_lock = threading.Lock()
+
+# ========== DB Helpers ==========
+@st.cache_resource
+def get_conn():
+    # One connection per process, reused across reruns; autocommit unless a
+    # transaction is opened explicitly with BEGIN
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    # WAL + NORMAL sync: one fsync per checkpoint instead of per commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_spill=OFF")
+    return conn
+
+def ensure_tables():
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.executescript("""
+    -- Questions
+    CREATE TABLE IF NOT EXISTS questions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        question TEXT UNIQUE,
+        option_a TEXT,
+        option_b TEXT,
+        option_c TEXT,
+        option_d TEXT,
+        answer TEXT,
+        subject TEXT,
+        chapter TEXT,
+        topic TEXT,
+        difficulty TEXT,
+        type TEXT
+    );
+
+    -- Scores
+    CREATE TABLE IF NOT EXISTS student_scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT,
+        question_id INTEGER,
+        is_correct INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Reminders
+    CREATE TABLE IF NOT EXISTS reminders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT,
+        weak_chapters TEXT,
+        reminder_text TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Users
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password_hash TEXT,
+        role TEXT
+    );
+
+    -- Indices for the per-student dashboard/leaderboard queries and chapter filters
+    CREATE INDEX IF NOT EXISTS idx_ss_student ON student_scores(student_id, question_id);
+    CREATE INDEX IF NOT EXISTS idx_q_chapter ON questions(chapter);
+    CREATE INDEX IF NOT EXISTS idx_q_subject ON questions(subject);
+    CREATE INDEX IF NOT EXISTS idx_rem_created ON reminders(created_at DESC);
+    """)
+
+    # Answer key normalized to a single letter, computed by SQLite on read so
+    # every writer (app, import script) stays consistent. table_xinfo is needed
+    # because table_info hides generated columns.
+    cols = [r[1] for r in cur.execute("PRAGMA table_xinfo(questions)")]
+    if "answer_letter" not in cols:
+        cur.execute("ALTER TABLE questions ADD COLUMN answer_letter TEXT AS (UPPER(SUBSTR(TRIM(answer),1,1))) VIRTUAL")
+
+    # Per-user salt for scrypt; NULL marks a legacy unsalted SHA-256 hash
+    if "salt" not in [r[1] for r in cur.execute("PRAGMA table_info(users)")]:
+        cur.execute("ALTER TABLE users ADD COLUMN salt BLOB")
+
+    cur.execute("ANALYZE")
+
+def fetch_df(query, params=()):
+    # Results here are small; skip read_sql_query's generic machinery
+    cur = get_conn().execute(query, params)
+    rows = cur.fetchall()
+    cols = [d[0] for d in cur.description]
+    return pd.DataFrame.from_records(rows, columns=cols)
+
+def execute(query, params=()):
+    with _write_lock:
+        get_conn().execute(query, params)
+
+# ========== Authentication ==========
+def hash_password(password, salt):
+    # scrypt is deliberately slow and memory-hard (~16 MB per hash) to resist brute force
+    return hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1, dklen=32).hex()
+
+def authenticate(username, password):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT password_hash, salt, role FROM users WHERE username=?", (username,))
+    row = cur.fetchone()
+    if row:
+        stored_hash, salt, role = row
+        if salt is None:
+            # Legacy unsalted SHA-256 row: verify it, then upgrade it to scrypt
+            if hmac.compare_digest(stored_hash, hashlib.sha256(password.encode()).hexdigest()):
+                salt = os.urandom(16)
+                execute("UPDATE users SET password_hash=?, salt=? WHERE username=?",
+                        (hash_password(password, salt), salt, username))
+                return True, role
+        elif hmac.compare_digest(stored_hash, hash_password(password, salt)):
+            return True, role
+    return False, None
+
+def seed_users():
+    conn = get_conn()
+    cur = conn.cursor()
+    demo_users = [
+        ("student1", "1234", "student"),
+        ("teacher1", "admin", "teacher"),
+    ]
+    with _write_lock:
+        for username, password, role in demo_users:
+            # Check first so existing users don't pay for a scrypt hash
+            if cur.execute("SELECT 1 FROM users WHERE username=?", (username,)).fetchone():
+                continue
+            salt = os.urandom(16)
+            cur.execute("INSERT INTO users (username, password_hash, salt, role) VALUES (?, ?, ?, ?)",
+                        (username, hash_password(password, salt), salt, role))
+
+# ========== Cached Reads ==========
+# Streamlit reruns the whole script on every widget event; these aggregates only
+# change when scores/questions are written, so they are memoized and cleared
+# explicitly by invalidate_score_caches() / invalidate_question_caches() after
+# each write.
+@st.cache_data(ttl=60)
+def load_student_attempts(student_id):
+    # Every dashboard aggregate is derived from this one result in pandas,
+    # except the running accuracy which SQLite computes as a window function
+    return fetch_df("""
+        SELECT s.id, q.subject, q.chapter, s.is_correct,
+               AVG(s.is_correct*1.0) OVER (ORDER BY s.id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) * 100 AS trend_acc
+        FROM student_scores s LEFT JOIN questions q ON s.question_id = q.id
+        WHERE s.student_id = ? ORDER BY s.id
+    """, (student_id,))
+
+@st.cache_data(ttl=60)
+def load_leaderboard(ascending=False):
+    df = fetch_df("""
+        SELECT student_id AS student, COUNT(*) AS attempted, SUM(is_correct) AS correct
+        FROM student_scores GROUP BY student_id
+    """)
+    df["accuracy"] = (df["correct"].to_numpy() * 100.0 / df["attempted"].to_numpy()).round(2)
+    return df.sort_values(["accuracy", "attempted"], ascending=[ascending, False], ignore_index=True)
+
+@st.cache_data(ttl=60)
+def load_question_id_range():
+    row = get_conn().execute("SELECT MIN(id), MAX(id), COUNT(*) FROM questions").fetchone()
+    return tuple(row)
+
+def invalidate_score_caches():
+    # Score writes never touch `questions`, so the question caches survive them
+    compute_weak_chapters.clear()
+    load_student_attempts.clear()
+    load_leaderboard.clear()
+
+def invalidate_question_caches():
+    load_question_id_range.clear()
+
+# ========== Features ==========
+@st.cache_data(ttl=60)
+def compute_weak_chapters(student_id, limit_chaps=3):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("""
+    SELECT q.chapter, SUM(s.is_correct) AS correct, COUNT(*) AS total
+    FROM student_scores s
+    JOIN questions q ON s.question_id = q.id
+    WHERE s.student_id = ?
+    GROUP BY q.chapter
+    ORDER BY (1.0*SUM(s.is_correct)/COUNT(*)) ASC
+    LIMIT ?
+    """, (student_id, limit_chaps))
+    rows = cur.fetchall()
+    return [r[0] for r in rows]
+
+# Columns needed to render a question; the answer key stays server-side and is
+# only read when grading
+QUESTION_COLS = "id, question, option_a, option_b, option_c, option_d"
+
+def fetch_questions_by_id(qids):
+    # Ids go in as one JSON array so the SQL text is constant and stays in
+    # sqlite3's statement cache, whatever the number of ids
+    cur = get_conn().execute(f"SELECT {QUESTION_COLS} FROM questions WHERE id IN (SELECT value FROM json_each(?))",
+                             (json.dumps(list(qids)),))
+    return cur.fetchall()
+
+def pick_random_questions(n_questions, attempts=5):
+    """Sample questions by probing random ids in [MIN(id), MAX(id)] instead of
+    ORDER BY RANDOM(), which scans and sorts the whole table."""
+    min_id, max_id, total = load_question_id_range()
+    if not total:
+        return []
+    want = min(n_questions, total)
+    span = max_id - min_id + 1
+    picked = {}
+    for _ in range(attempts):
+        candidates = random.sample(range(min_id, max_id + 1), k=min(want * 2, span))
+        candidates = [qid for qid in candidates if qid not in picked]
+        for r in fetch_questions_by_id(candidates):
+            picked[r["id"]] = r
+        if len(picked) >= want:
+            break
+    else:
+        # id range too sparse (many deletions); fall back to a full random sort
+        cur = get_conn().execute(f"SELECT {QUESTION_COLS} FROM questions ORDER BY RANDOM() LIMIT ?", (want,))
+        return cur.fetchall()
+    rows = list(picked.values())
+    random.shuffle(rows)
+    return rows[:want]
+
+def pick_chapter_questions(chapters, n_questions):
+    # Only the weak chapters' ids are read (via idx_q_chapter); sampling them in
+    # Python avoids sorting the matching rows with ORDER BY RANDOM()
+    cur = get_conn().execute("SELECT id FROM questions WHERE chapter IN (SELECT value FROM json_each(?))",
+                             (json.dumps(list(chapters)),))
+    pool = [r[0] for r in cur.fetchall()]
+    if not pool:
+        return []
+    rows = fetch_questions_by_id(random.sample(pool, k=min(n_questions, len(pool))))
+    random.shuffle(rows)
+    return rows
+
+def save_reminder(student_id, weak_chapters, reminder_text):
+    execute("INSERT INTO reminders (student_id, weak_chapters, reminder_text) VALUES (?, ?, ?)",
+            (student_id, ",".join(weak_chapters), reminder_text))
+
+def save_test_answers(student_id, answers):
+    """Grade {question_id: choice} in one lookup and record it in one transaction.
+    Returns the number of correct answers."""
+    conn = get_conn()
+    cur = conn.cursor()
+    if not answers:
+        return 0
+    cur.execute("SELECT id, answer_letter FROM questions WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(answers)),))
+    answer_key = {r["id"]: r["answer_letter"] for r in cur.fetchall()}
+    vals = []
+    for qid, choice in answers.items():
+        vals += [student_id, qid, int(choice == answer_key.get(qid))]
+    # One multi-row INSERT for the whole test (a handful of rows, well under
+    # SQLite's bound-parameter limit)
+    placeholders = ",".join(["(?, ?, ?)"] * len(answers))
+    # `with conn` commits on success and rolls back if anything raises
+    with _write_lock, conn:
+        cur.execute("BEGIN")
+        cur.execute(f"INSERT INTO student_scores (student_id, question_id, is_correct) VALUES {placeholders}", vals)
+    invalidate_score_caches()
+    return sum(vals[2::3])